@@ -1,16 +1,25 @@
 """OCR Router - Routes OCR requests to Doctr, Surya (API), or PaddleOCR (local)."""
 
 import base64
+import copy
+import hashlib
 import io
 import os
 import json
+import threading
 import requests
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, Literal
+from dataclasses import dataclass, asdict, replace
+from typing import Optional, Dict, Any, Iterator, List, Literal
 from PIL import Image
 from loguru import logger
 
+from .text_processor import _ensure_dir
+
 try:
     from dotenv import load_dotenv
     env_path = Path(__file__).parent.parent / ".env"
@@ -19,11 +28,40 @@ try:
 except ImportError:
     pass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
 API_KEY = os.environ.get("RUNPOD_API_KEY", "")
 OCR_URL = os.environ.get("OCR_ENDPOINT_URL")
 
+# Result cache settings; bump OCR_CACHE_VERSION when a model changes behind the same name
+OCR_CACHE_SIZE = int(os.environ.get("OCR_CACHE_SIZE", "1024"))
+OCR_CACHE_DIR = os.environ.get("OCR_CACHE_DIR")
+OCR_CACHE_VERSION = os.environ.get("OCR_CACHE_VERSION", "1")
+
+# Images loaded and decoded at a time by the batched PaddleOCR path
+PADDLE_BATCH_WINDOW = int(os.environ.get("PADDLE_BATCH_WINDOW", "64"))
+
 ModelType = Literal["doctr", "surya", "paddle"]
 
+# Shared session so repeated API calls reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
 
 @dataclass
 class OCRResult:
@@ -42,21 +80,92 @@ def _error_result(model: str, error: str) -> OCRResult:
     return OCRResult(model=model, custom_text="", text="", words=[], raw_json={}, success=False, error=error)
 
 
+def _copy_result(result: OCRResult) -> OCRResult:
+    """Copy an OCRResult deeply enough that callers cannot mutate a cached entry."""
+    return replace(result, words=copy.deepcopy(result.words), raw_json=copy.deepcopy(result.raw_json))
+
+
+class _ResultCache:
+    """Bounded in-process LRU of successful OCRResults, with an optional diskcache layer."""
+    
+    def __init__(self, maxsize: int, disk_dir: Optional[str] = None):
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, OCRResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = diskcache.Cache(disk_dir) if disk_dir and DISKCACHE_AVAILABLE else None
+    
+    def get(self, key: str) -> Optional[OCRResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return _copy_result(result)
+        
+        if self._disk is not None:
+            data = self._disk.get(key)
+            if data is not None:
+                result = OCRResult(**data)
+                self._remember(key, result)
+                return _copy_result(result)
+        return None
+    
+    def put(self, key: str, result: OCRResult) -> None:
+        self._remember(key, _copy_result(result))
+        if self._disk is not None:
+            self._disk.set(key, asdict(result))
+    
+    def _remember(self, key: str, result: OCRResult) -> None:
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+
+_RESULT_CACHE = _ResultCache(OCR_CACHE_SIZE, OCR_CACHE_DIR)
+
+# PaddleOCR settings that change its output without changing the model name
+_PADDLE_CACHE_ENV = (
+    "PADDLE_DET_MODEL_DIR",
+    "PADDLE_REC_MODEL_DIR",
+    "PADDLE_CLS_MODEL_DIR",
+    "PADDLE_PRECISION",
+    "PADDLE_USE_TENSORRT",
+    "PADDLE_ENABLE_MKLDNN",
+)
+
+
+def _cache_key(image: Image.Image, model: str) -> str:
+    """Content hash of the decoded pixels, scoped to model, model settings and cache version."""
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    if model == "paddle":
+        # "exif" marks results computed from EXIF-transposed pixels
+        settings = "exif|" + "|".join(f"{name}={os.environ.get(name, '')}" for name in _PADDLE_CACHE_ENV)
+        digest.update(settings.encode())
+    digest.update(image.tobytes())
+    return f"{model}:{OCR_CACHE_VERSION}:{digest.hexdigest()}"
+
+
 def pil_to_base64(image: Image.Image) -> str:
     """Convert PIL Image to base64 string."""
     buf = io.BytesIO()
     if image.mode in ("RGBA", "P"):
         image = image.convert("RGB")
-    image.save(buf, format='JPEG')
-    return base64.b64encode(buf.getvalue()).decode('utf-8')
+    # Explicit encoder settings: high enough quality for OCR, no slow optimize pass
+    image.save(buf, format='JPEG', quality=85, optimize=False, subsampling='4:2:0')
+    return base64.b64encode(buf.getvalue()).decode('ascii')
 
 
 def load_image(path: str) -> Image.Image:
     """Load image from path or URL."""
     if path.startswith(('http://', 'https://')):
-        import urllib.request
-        with urllib.request.urlopen(path) as resp:
-            return Image.open(io.BytesIO(resp.read()))
+        # Fetch over the pooled session; the context manager releases the
+        # connection even if the body fails to decode
+        with _SESSION.get(path, timeout=30) as resp:
+            resp.raise_for_status()
+            return Image.open(io.BytesIO(resp.content))
     return Image.open(path)
 
 
@@ -66,7 +175,8 @@ def call_api(base64_image: str, model: str) -> Dict[str, Any]:
     payload = {"input": {"model": model, "type": "image", "format": "base64", "data": base64_image}}
     
     try:
-        resp = requests.post(OCR_URL, headers=headers, json=payload, timeout=600)
+        body = orjson.dumps(payload) if orjson else json.dumps(payload).encode('ascii')
+        resp = _SESSION.post(OCR_URL, headers=headers, data=body, timeout=600)
         resp.raise_for_status()
         result = resp.json()
         
@@ -77,40 +187,127 @@ def call_api(base64_image: str, model: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+def _load_cached(image_path: str, model: ModelType):
+    """Load an image and look up its cached result; returns (image, cache_key, cached_or_None)."""
+    image = load_image(image_path)
+    cache_key = _cache_key(image, model)
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info(f"OCR cache hit: {model} on {image_path}")
+    return image, cache_key, cached
+
+
 def run_ocr(image_path: str, model: ModelType) -> OCRResult:
-    """Run OCR on image using specified model."""
+    """Run OCR on image using specified model, reusing cached results for identical images."""
     logger.info(f"Running OCR: {model} on {image_path}")
     
     try:
-        image = load_image(image_path)
-        b64 = pil_to_base64(image)
+        image, cache_key, cached = _load_cached(image_path, model)
+        if cached is not None:
+            return cached
         
-        if model in ("doctr", "surya"):
-            result = call_api(b64, model)
-            if not result["success"]:
-                return _error_result(model, result["error"])
-            
-            data = result["data"]
-            return OCRResult(
-                model=model,
-                custom_text=data.get("custom_text", ""),
-                text=data.get("text", ""),
-                words=data.get("words", []),
-                raw_json=data,
-                success=True
-            )
-        
-        elif model == "paddle":
-            from .paddle_local import run_paddle_ocr
-            return run_paddle_ocr(image_path, image)
-        
-        return _error_result(model, f"Unknown model: {model}")
+        result = _run_model(image_path, image, model)
+        if result.success:
+            _RESULT_CACHE.put(cache_key, result)
+        return result
         
     except Exception as e:
         logger.error(f"OCR failed: {e}")
         return _error_result(model, str(e))
 
 
+def _run_model(image_path: str, image: Image.Image, model: ModelType) -> OCRResult:
+    """Dispatch a loaded image to the requested OCR backend."""
+    if model in ("doctr", "surya"):
+        # Only the API backends need the JPEG/base64 payload
+        result = call_api(pil_to_base64(image), model)
+        if not result["success"]:
+            return _error_result(model, result["error"])
+        
+        data = result["data"]
+        return OCRResult(
+            model=model,
+            custom_text=data.get("custom_text", ""),
+            text=data.get("text", ""),
+            words=data.get("words", []),
+            raw_json=data,
+            success=True
+        )
+    
+    elif model == "paddle":
+        from .paddle_local import run_paddle_ocr
+        return run_paddle_ocr(image_path, image)
+    
+    return _error_result(model, f"Unknown model: {model}")
+
+
+def run_ocr_batch(image_paths: List[str], model: ModelType, max_workers: int = 8) -> List[OCRResult]:
+    """Run OCR on many images concurrently, returning results in input order."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if model == "paddle":
+            results = []
+            # Windowed so a large batch never holds every decoded image at once
+            for start in range(0, len(image_paths), PADDLE_BATCH_WINDOW):
+                window = image_paths[start:start + PADDLE_BATCH_WINDOW]
+                results.extend(_run_paddle_window(window, executor))
+            return results
+        
+        return list(executor.map(lambda path: run_ocr(path, model), image_paths))
+
+
+def _run_paddle_window(image_paths: List[str], executor: ThreadPoolExecutor) -> List[OCRResult]:
+    """Load and cache-check a window of images, then batch the misses through PaddleOCR."""
+    from .paddle_local import run_paddle_ocr_batch
+    
+    def load(path: str):
+        try:
+            return _load_cached(path, "paddle")
+        except Exception as e:
+            logger.error(f"OCR failed: {e}")
+            return e
+    
+    results: List[Optional[OCRResult]] = [None] * len(image_paths)
+    misses = []
+    for idx, loaded in enumerate(executor.map(load, image_paths)):
+        if isinstance(loaded, Exception):
+            results[idx] = _error_result("paddle", str(loaded))
+            continue
+        image, cache_key, cached = loaded
+        if cached is not None:
+            results[idx] = cached
+        else:
+            misses.append((idx, image, cache_key))
+    
+    if misses:
+        batch = run_paddle_ocr_batch(
+            [image_paths[idx] for idx, _, _ in misses],
+            [image for _, image, _ in misses]
+        )
+        for (idx, _, cache_key), result in zip(misses, batch):
+            if result.success:
+                _RESULT_CACHE.put(cache_key, result)
+            results[idx] = result
+    
+    return results
+
+
+def iter_ocr(image_paths: List[str], model: ModelType, prefetch: int = 4) -> Iterator[OCRResult]:
+    """
+    Yield OCR results in input order while the next images load and run in the background.
+    
+    Up to `prefetch` images are in flight at once, so loading image N+1 overlaps
+    the OCR call for image N without materializing the whole batch.
+    """
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        pending = deque()
+        for path in image_paths:
+            pending.append(executor.submit(run_ocr, path, model))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 def save_ocr_result(result: OCRResult, output_path: str) -> None:
     """Save OCR result to JSON file."""
     output = {
@@ -121,6 +318,10 @@ def save_ocr_result(result: OCRResult, output_path: str) -> None:
     if result.error:
         output["error"] = result.error
     
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    Path(output_path).write_text(json.dumps(output, indent=2, ensure_ascii=False))
+    _ensure_dir(Path(output_path).parent)
+    if orjson:
+        data = orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(output, indent=2, ensure_ascii=False).encode('utf-8')
+    Path(output_path).write_bytes(data)
     logger.success(f"Saved: {output_path}")
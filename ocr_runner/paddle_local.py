@@ -1,94 +1,335 @@
 """PaddleOCR Runner - Local OCR using PaddleOCR."""
 
-from typing import Optional
-from PIL import Image
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Callable, Any, List
+from PIL import Image, ImageOps
 from loguru import logger
 
 try:
+    import numpy as np
     from paddleocr import PaddleOCR
     PADDLE_AVAILABLE = True
 except ImportError:
     PADDLE_AVAILABLE = False
 
-_ocr_instance: Optional['PaddleOCR'] = None
+# Optional overrides, e.g. pointing at INT8 (slim/quantized) model exports
+_MODEL_DIR_ENV = {
+    "PADDLE_DET_MODEL_DIR": "text_detection_model_dir",
+    "PADDLE_REC_MODEL_DIR": "text_recognition_model_dir",
+    "PADDLE_CLS_MODEL_DIR": "textline_orientation_model_dir",
+}
 
 
-def get_paddle_instance() -> 'PaddleOCR':
-    """Get or create PaddleOCR singleton instance."""
-    global _ocr_instance
-    if _ocr_instance is None:
-        if not PADDLE_AVAILABLE:
-            raise ImportError("PaddleOCR is not installed")
+def create_paddle_model(device: Optional[str] = None) -> 'PaddleOCR':
+    """Create a new PaddleOCR model instance, optionally pinned to a device (e.g. "gpu:1")."""
+    if not PADDLE_AVAILABLE:
+        raise ImportError("PaddleOCR is not installed")
+    
+    kwargs = {"device": device} if device else {}
+    
+    for env_name, param in _MODEL_DIR_ENV.items():
+        if os.environ.get(env_name):
+            kwargs[param] = os.environ[env_name]
+    
+    # GPU inference precision, e.g. "fp16" (with PADDLE_USE_TENSORRT=1 for TensorRT engines)
+    if os.environ.get("PADDLE_PRECISION"):
+        kwargs["precision"] = os.environ["PADDLE_PRECISION"]
+    if os.environ.get("PADDLE_USE_TENSORRT") == "1":
+        kwargs["use_tensorrt"] = True
+    
+    # MKLDNN is on by default for CPU inference; PADDLE_ENABLE_MKLDNN=0 turns it
+    # off on runners whose CPUs crash in the oneDNN kernels
+    mkldnn = os.environ.get("PADDLE_ENABLE_MKLDNN")
+    if mkldnn is not None:
+        kwargs["enable_mkldnn"] = mkldnn.strip().lower() not in ("0", "false", "no")
+    
+    # Optimization: Use mobile models and limit resources to avoid OOM kills on CI
+    # Note: Newer PaddleOCR versions (Integrated with PaddleX) have a different signature.
+    return PaddleOCR(
+        lang='en',
+        ocr_version='PP-OCRv4',
+        use_textline_orientation=True,
+        **kwargs
+    )
+
+
+class PaddleOCRModelManager:
+    """Pool of worker threads, each owning a private PaddleOCR model, fed by one queue."""
+    
+    def __init__(self, model_factories: List[Callable[[], Any]]):
+        self._queue: queue.Queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
         
-        # Optimization: Use mobile models and limit resources to avoid OOM kills on CI
-        # Note: Newer PaddleOCR versions (Integrated with PaddleX) have a different signature.
-        _ocr_instance = PaddleOCR(
-            lang='en',
-            ocr_version='PP-OCRv4',
-            use_textline_orientation=True
+        # Build models one at a time: concurrent constructors would download and
+        # unpack the same model files into ~/.paddlex at once on a cold cache
+        ready: queue.Queue = queue.Queue()
+        for factory in model_factories:
+            worker = threading.Thread(target=self._worker, args=(factory, ready), daemon=True)
+            worker.start()
+            error = ready.get()
+            if error is not None:
+                # Release the models already built instead of leaking their workers
+                self.shutdown()
+                raise error
+            self._workers.append(worker)
+    
+    @property
+    def num_workers(self) -> int:
+        return len(self._workers)
+    
+    def shutdown(self) -> None:
+        """Stop all workers, dropping their models."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+    
+    def infer(self, *args, **kwargs):
+        """Run predict() on the next free worker and block until it returns."""
+        result_queue: queue.Queue = queue.Queue(maxsize=1)
+        self._queue.put((args, kwargs, result_queue))
+        ok, payload = result_queue.get()
+        if not ok:
+            raise payload
+        return payload
+    
+    def _worker(self, model_factory: Callable[[], Any], ready: queue.Queue) -> None:
+        try:
+            model = model_factory()
+        except BaseException as e:
+            ready.put(e)
+            return
+        ready.put(None)
+        
+        while True:
+            item = self._queue.get()
+            if item is None:
+                # Shutdown sentinel
+                self._queue.task_done()
+                return
+            args, kwargs, result_queue = item
+            try:
+                result_queue.put((True, model.predict(*args, **kwargs)))
+            except BaseException as e:
+                result_queue.put((False, e))
+            finally:
+                self._queue.task_done()
+
+
+_manager: Optional[PaddleOCRModelManager] = None
+_manager_error: Optional[BaseException] = None
+_manager_lock = threading.Lock()
+
+
+def _default_num_workers() -> int:
+    """Worker count from PADDLE_NUM_WORKERS, else a single worker."""
+    env_workers = os.environ.get("PADDLE_NUM_WORKERS")
+    if env_workers:
+        return max(1, int(env_workers))
+    # Every worker holds a full model; extra ones are opt-in to avoid OOM kills on CI
+    return 1
+
+
+def _paddle_devices() -> List[str]:
+    """
+    Parse PADDLE_DEVICES into one device per worker.
+    
+    Accepts "gpu:0,1,2,3" as shorthand for "gpu:0,gpu:1,gpu:2,gpu:3".
+    """
+    devices = []
+    device_type = None
+    for item in os.environ.get("PADDLE_DEVICES", "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if ":" in item:
+            device_type = item.split(":", 1)[0]
+            devices.append(item)
+        elif device_type and item.isdigit():
+            devices.append(f"{device_type}:{item}")
+        else:
+            devices.append(item)
+    return devices
+
+
+def get_paddle_manager() -> PaddleOCRModelManager:
+    """Get or create the PaddleOCR worker pool singleton."""
+    global _manager, _manager_error
+    if _manager is None:
+        # Double-checked so concurrent first callers build the (multi-GB) pool only once
+        with _manager_lock:
+            if _manager is None:
+                if not PADDLE_AVAILABLE:
+                    raise ImportError("PaddleOCR is not installed")
+                # A failed build is not retried per image; every call re-raises it
+                if _manager_error is not None:
+                    raise _manager_error
+                devices = _paddle_devices()
+                if devices:
+                    # One worker per device so inputs are sharded across GPUs
+                    factories = [partial(create_paddle_model, device) for device in devices]
+                else:
+                    factories = [create_paddle_model] * _default_num_workers()
+                try:
+                    _manager = PaddleOCRModelManager(factories)
+                except BaseException as e:
+                    _manager_error = e
+                    raise
+    return _manager
+
+
+def warmup() -> None:
+    """Build the model pool and run one dummy inference per worker to pay first-call setup upfront."""
+    manager = get_paddle_manager()
+    dummy = np.zeros((32, 32, 3), dtype=np.uint8)
+    # One dummy call per worker, submitted concurrently. This is best effort: the
+    # shared queue does not pin calls to workers, so a worker that finishes early
+    # may take a second call and leave another cold.
+    with ThreadPoolExecutor(max_workers=manager.num_workers) as executor:
+        list(executor.map(lambda _: manager.infer(dummy), range(manager.num_workers)))
+
+
+def _pages_to_result(pages) -> 'OCRResult':
+    """Build an OCRResult from PaddleOCR predict() pages."""
+    from .ocr_router import OCRResult
+    
+    words = []
+    words_bboxes = []
+    
+    for page in pages:
+        rec_texts = page.get('rec_texts', []) if hasattr(page, 'get') else getattr(page, 'rec_texts', [])
+        rec_polys = page.get('rec_polys', []) if hasattr(page, 'get') else getattr(page, 'rec_polys', [])
+        
+        words.extend(rec_texts)
+        
+        n_boxes = min(len(rec_texts), len(rec_polys))
+        if not n_boxes:
+            continue
+        polys = rec_polys[:n_boxes]
+        uniform = (
+            polys.ndim == 3 if isinstance(polys, np.ndarray)
+            else len({len(poly) for poly in polys}) == 1
         )
-    return _ocr_instance
+        if uniform:
+            # (N, K, 2) points -> (N, 4) [x_min, y_min, x_max, y_max] in one vectorized pass
+            polys = np.asarray(polys)
+            bboxes = np.concatenate([polys.min(axis=1), polys.max(axis=1)], axis=1)
+            words_bboxes.extend(bboxes.astype(np.int64).tolist())
+        else:
+            # Polygons with differing point counts (e.g. text_det_box_type="poly")
+            for poly in polys:
+                poly = np.asarray(poly)
+                words_bboxes.append([
+                    int(poly[:, 0].min()), int(poly[:, 1].min()),
+                    int(poly[:, 0].max()), int(poly[:, 1].max())
+                ])
+    
+    return OCRResult(
+        model="paddle",
+        custom_text="\n".join(words),
+        text=" ".join(words),
+        words=words,
+        raw_json={"words_bboxes": words_bboxes},
+        success=True
+    )
+
+
+def _critical_error_result(e: BaseException) -> 'OCRResult':
+    """Build the error OCRResult for an unexpected PaddleOCR failure."""
+    from .ocr_router import _error_result
+    return _error_result("paddle", f"Critical Error: {str(e)} | Type: {type(e).__name__}")
+
+
+def _to_paddle_input(image: Image.Image) -> 'np.ndarray':
+    """Convert a PIL image to the BGR uint8 array PaddleOCR expects (OpenCV channel order)."""
+    # Apply EXIF orientation, as cv2.imread does when PaddleOCR is given a path
+    return np.asarray(ImageOps.exif_transpose(image).convert('RGB'))[:, :, ::-1]
 
 
 def run_paddle_ocr(image_path: str, image: Optional[Image.Image] = None):
     """Run PaddleOCR on an image and return OCRResult."""
-    from .ocr_router import OCRResult
-    
-    import os
-    import sys
-    import traceback
+    from .ocr_router import _error_result
     
     try:
-        if not os.path.exists(image_path):
-             return OCRResult(
-                model="paddle",
-                custom_text="",
-                text="",
-                words=[],
-                raw_json={},
-                success=False,
-                error=f"File not found: {image_path}"
-            )
-
-        ocr = get_paddle_instance()
+        if image is None and not os.path.exists(image_path):
+            return _error_result("paddle", f"File not found: {image_path}")
+
+        manager = get_paddle_manager()
         logger.info(f"Running PaddleOCR on: {image_path}")
-        result = ocr.predict(image_path)
-        
-        words = []
-        words_bboxes = []
+        # Reuse the caller's decoded image instead of re-reading the file
+        result = manager.infer(_to_paddle_input(image) if image is not None else image_path)
         
-        for page in result:
-            rec_texts = page.get('rec_texts', []) if hasattr(page, 'get') else getattr(page, 'rec_texts', [])
-            rec_polys = page.get('rec_polys', []) if hasattr(page, 'get') else getattr(page, 'rec_polys', [])
-            
-            for i, text in enumerate(rec_texts):
-                words.append(text)
-                if rec_polys and i < len(rec_polys):
-                    poly = rec_polys[i]
-                    x_coords = [p[0] for p in poly]
-                    y_coords = [p[1] for p in poly]
-                    words_bboxes.append([
-                        int(min(x_coords)), int(min(y_coords)),
-                        int(max(x_coords)), int(max(y_coords))
-                    ])
-        
-        return OCRResult(
-            model="paddle",
-            custom_text="\n".join(words),
-            text=" ".join(words),
-            words=words,
-            raw_json={"words_bboxes": words_bboxes},
-            success=True
-        )
+        return _pages_to_result(result)
         
     except BaseException as e:
         logger.exception(f"PaddleOCR failed with critical error: {e}")
-        return OCRResult(
-            model="paddle",
-            custom_text="",
-            text="",
-            words=[],
-            raw_json={},
-            success=False,
-            error=f"Critical Error: {str(e)} | Type: {type(e).__name__}"
-        )
+        return _critical_error_result(e)
+
+
+def run_paddle_ocr_batch(
+    image_paths: List[str],
+    images: Optional[List[Image.Image]] = None,
+    batch_size: int = 8
+) -> List['OCRResult']:
+    """
+    Run PaddleOCR on many images using native list batching in predict().
+    
+    Inputs are split into chunks of batch_size and the chunks are submitted
+    concurrently, so every worker in the model pool receives a batch. When
+    images are given (already decoded, e.g. from URLs), they are sent as arrays
+    and image_paths are only used for logging and error messages.
+    
+    Returns:
+        One OCRResult per input path, in input order
+    """
+    from .ocr_router import _error_result
+    
+    results: List[Optional['OCRResult']] = [None] * len(image_paths)
+    if images is not None:
+        pending = list(range(len(image_paths)))
+    else:
+        pending = []
+        for idx, path in enumerate(image_paths):
+            if os.path.exists(path):
+                pending.append(idx)
+            else:
+                results[idx] = _error_result("paddle", f"File not found: {path}")
+    
+    if pending:
+        try:
+            manager = get_paddle_manager()
+        except BaseException as e:
+            logger.exception(f"PaddleOCR failed with critical error: {e}")
+            for idx in pending:
+                results[idx] = _critical_error_result(e)
+            return results
+        
+        def run_chunk(indices: List[int]) -> None:
+            try:
+                # Arrays are converted per chunk so only in-flight batches are held
+                inputs = [_to_paddle_input(images[i]) if images is not None else image_paths[i] for i in indices]
+                pages = manager.infer(inputs)
+                for idx, page in zip(indices, pages):
+                    results[idx] = _pages_to_result([page])
+            except BaseException as e:
+                logger.exception(f"PaddleOCR batch failed with critical error: {e}")
+                for idx in indices:
+                    results[idx] = _critical_error_result(e)
+        
+        logger.info(f"Running PaddleOCR on {len(pending)} images (batch size {batch_size})")
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        # More submitters than workers would only queue up in the pool
+        with ThreadPoolExecutor(max_workers=min(len(chunks), manager.num_workers)) as executor:
+            list(executor.map(run_chunk, chunks))
+    
+    # predict() returning fewer pages than inputs leaves gaps
+    for idx, result in enumerate(results):
+        if result is None:
+            results[idx] = _error_result("paddle", f"No PaddleOCR output for: {image_paths[idx]}")
+    
+    return results
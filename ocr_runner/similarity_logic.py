@@ -9,7 +9,29 @@ from datetime import datetime
 import string
 from collections import Counter
 from dataclasses import dataclass
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# RE2 (linear-time DFA) only for the tag pattern: its \s and \d are ASCII-only,
+# so the whitespace/entity patterns stay on `re` to keep Unicode semantics
+_TAG_RE = (re2 or re).compile(r'<[^>]+>')
+_ENTITY_RE = re.compile(r'&(?:[a-zA-Z]+|#\d+);')
+_WS_RE = re.compile(r'\s+')
+
+# Joining punctuation is dropped along with any surrounding whitespace
+_JOIN_PUNCT = ',/'
+_JOIN_RE = re.compile(r'\s*[' + re.escape(_JOIN_PUNCT) + r']\s*')
+
+# Every other ASCII punctuation mark except preserved prefixes becomes a space
+_PRESERVE_CHARS = '$#@₹€£¥%'
+_PUNCT_TO_SPACE = str.maketrans({
+    c: ' ' for c in string.punctuation if c not in _JOIN_PUNCT and c not in _PRESERVE_CHARS
+})
 
 
 @dataclass
@@ -28,10 +50,9 @@ def strip_html_tags(text: str) -> str:
     Remove HTML tags from text.
     """
     # Remove HTML tags (anything between < and >)
-    text = re.sub(r'<[^>]+>', ' ', text)
-    # Remove HTML entities like &nbsp; &amp; etc.
-    text = re.sub(r'&[a-zA-Z]+;', ' ', text)
-    text = re.sub(r'&#\d+;', ' ', text)
+    text = _TAG_RE.sub(' ', text)
+    # Remove HTML entities like &nbsp; &amp; &#39; etc.
+    text = _ENTITY_RE.sub(' ', text)
     return text
 
 
@@ -53,37 +74,34 @@ def normalize_text(text: str) -> str:
     Important prefixes like "$500", "#123", "@user" are preserved.
     """
 
-    text = strip_html_tags(text)
-    text = text.lower()
-    joining_punct = [',', '/']    
-    preserve_chars = ['$', '#', '@', '₹', '€', '£', '¥', '%']
-    
-    for p in joining_punct:
-        text = re.sub(r'\s*' + re.escape(p) + r'\s*', p, text)
-    
-    for p in joining_punct:
-        text = text.replace(p, '')
-    
-    for char in string.punctuation:
-        if char not in joining_punct and char not in preserve_chars:
-            text = text.replace(char, ' ')
-    
-    text = re.sub(r'\s+', ' ', text)
+    text = _normalize_chars(text)
+    text = _WS_RE.sub(' ', text)
     text = text.strip()
     
     return text
 
 
+def _normalize_chars(text: str) -> str:
+    """normalize_text() without the whitespace collapse, which str.split() makes redundant."""
+    text = strip_html_tags(text)
+    text = text.lower()
+    text = _JOIN_RE.sub('', text)
+    return text.translate(_PUNCT_TO_SPACE)
+
+
 def tokenize(text: str) -> List[str]:
     """
     Tokenize normalized text into words.
     
     Returns a list of words (tokens) from the normalized text.
     """
-    normalized = normalize_text(text)
-    if not normalized:
-        return []
-    return normalized.split()
+    return list(_tokenize_cached(text))
+
+
+@lru_cache(maxsize=256)
+def _tokenize_cached(text: str) -> Tuple[str, ...]:
+    """Cached tokenization; the same GT text is often compared to many OCR outputs."""
+    return tuple(_normalize_chars(text).split())
 
 
 def compute_similarity(gt_text: str, ocr_text: str) -> SimilarityResult:
@@ -115,26 +133,14 @@ def compute_similarity(gt_text: str, ocr_text: str) -> SimilarityResult:
     gt_counter = Counter(gt_words)
     ocr_counter = Counter(ocr_words)
 
-    correct_count = 0
-    missing_words = []
-    incorrect_words_list = []
+    # Number of correct matches per word is the minimum of GT and OCR counts
+    matched_counter = gt_counter & ocr_counter
+    correct_count = sum(matched_counter.values())
     
-    # For each unique word in GT, check how many are matched in OCR
-    for word, gt_count in gt_counter.items():
-        ocr_count = ocr_counter.get(word, 0)
-        
-        # Number of correct matches is the minimum of GT and OCR counts
-        matched = min(gt_count, ocr_count)
-        correct_count += matched
-        
-        # Missing occurrences
-        missing = gt_count - matched
-        if missing > 0:
-            for _ in range(missing):
-                missing_words.append(word)
-                incorrect_words_list.append((word, "MISSING"))
+    # Missing occurrences, in GT first-seen order
+    missing_words = list((gt_counter - matched_counter).elements())
+    incorrect_words_list = [(word, "MISSING") for word in missing_words]
     
-  
     total_gt_words = len(gt_words)
     incorrect_count = total_gt_words - correct_count
     
@@ -156,37 +162,44 @@ def load_text_file(filepath: str) -> str:
         return f.read()
 
 
+def _missing_words_lines(missing_words: List[str]) -> List[str]:
+    """Group missing words with counts for cleaner output."""
+    if not missing_words:
+        return ["Missing Words: None"]
+    lines = ["Missing Words:"]
+    lines.extend(
+        f"  - '{word}' (x{count})" if count > 1 else f"  - '{word}'"
+        for word, count in Counter(missing_words).items()
+    )
+    return lines
+
+
 def print_result(result: SimilarityResult, gt_file: str = None, ocr_file: str = None):
     """Print formatted similarity result."""
-    print("=" * 60)
-    print("OCR SIMILARITY EVALUATION REPORT")
-    print("=" * 60)
+    lines = [
+        "=" * 60,
+        "OCR SIMILARITY EVALUATION REPORT",
+        "=" * 60,
+    ]
     
     if gt_file:
-        print(f"Ground Truth File : {gt_file}")
+        lines.append(f"Ground Truth File : {gt_file}")
     if ocr_file:
-        print(f"OCR Output File   : {ocr_file}")
+        lines.append(f"OCR Output File   : {ocr_file}")
     
-    print("-" * 60)
-    print(f"Similarity Score  : {result.similarity_score:.2f}%")
-    print(f"Total GT Words    : {result.total_gt_words}")
-    print(f"Correct Words     : {result.correct_words}")
-    print(f"Incorrect Words   : {result.incorrect_words}")
-    print("-" * 60)
-    
-    if result.missing_words:
-        # Group missing words with counts for cleaner output
-        missing_counter = Counter(result.missing_words)
-        print("Missing Words:")
-        for word, count in missing_counter.items():
-            if count > 1:
-                print(f"  - '{word}' (x{count})")
-            else:
-                print(f"  - '{word}'")
-    else:
-        print("Missing Words: None")
+    lines.extend([
+        "-" * 60,
+        f"Similarity Score  : {result.similarity_score:.2f}%",
+        f"Total GT Words    : {result.total_gt_words}",
+        f"Correct Words     : {result.correct_words}",
+        f"Incorrect Words   : {result.incorrect_words}",
+        "-" * 60,
+    ])
+    lines.extend(_missing_words_lines(result.missing_words))
+    lines.append("=" * 60)
     
-    print("=" * 60)
+    # Emit the whole report in one write
+    print("\n".join(lines))
 
 def save_result_text(
     result: SimilarityResult,
@@ -208,35 +221,31 @@ def save_result_text(
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, output_filename)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("=" * 60 + "\n")
-        f.write("OCR SIMILARITY EVALUATION REPORT\n")
-        f.write("=" * 60 + "\n")
-
-        if gt_file:
-            f.write(f"Ground Truth File : {gt_file}\n")
-        if ocr_file:
-            f.write(f"OCR Output File   : {ocr_file}\n")
-
-        f.write("-" * 60 + "\n")
-        f.write(f"Similarity Score : {result.similarity_score:.2f}%\n")
-        f.write(f"Total GT Words   : {result.total_gt_words}\n")
-        f.write(f"Correct Words    : {result.correct_words}\n")
-        f.write(f"Incorrect Words  : {result.incorrect_words}\n")
-        f.write("-" * 60 + "\n")
-
-        if result.missing_words:
-            f.write("Missing Words:\n")
-            counter = Counter(result.missing_words)
-            for word, count in counter.items():
-                if count > 1:
-                    f.write(f"  - '{word}' (x{count})\n")
-                else:
-                    f.write(f"  - '{word}'\n")
-        else:
-            f.write("Missing Words: None\n")
+    lines = [
+        "=" * 60,
+        "OCR SIMILARITY EVALUATION REPORT",
+        "=" * 60,
+    ]
 
-        f.write("=" * 60 + "\n")
+    if gt_file:
+        lines.append(f"Ground Truth File : {gt_file}")
+    if ocr_file:
+        lines.append(f"OCR Output File   : {ocr_file}")
+
+    lines.extend([
+        "-" * 60,
+        f"Similarity Score : {result.similarity_score:.2f}%",
+        f"Total GT Words   : {result.total_gt_words}",
+        f"Correct Words    : {result.correct_words}",
+        f"Incorrect Words  : {result.incorrect_words}",
+        "-" * 60,
+    ])
+    lines.extend(_missing_words_lines(result.missing_words))
+    lines.append("=" * 60)
+
+    # Build the report once and write it in a single call
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
 
     print(f"\n Text report saved to: {output_path}")
 
@@ -272,6 +281,27 @@ def compute_ocr_similarity(gt_text: str, ocr_text: str) -> float:
     return result.similarity_score / 100.0  # Convert from percentage to 0-1 scale
 
 
+def summarize_scores(scores: Iterable[float]) -> Tuple[float, int, int, int]:
+    """
+    Average similarity scores and bucket them in a single pass.
+    
+    Returns:
+        (average, high >= 90, medium 70-89, low < 70); average is 0 with no scores
+    """
+    total = 0.0
+    count = high = medium = low = 0
+    for score in scores:
+        total += score
+        count += 1
+        if score >= 90:
+            high += 1
+        elif score >= 70:
+            medium += 1
+        else:
+            low += 1
+    return (total / count if count else 0), high, medium, low
+
+
 if __name__ == "__main__":
     import sys
 
@@ -3,8 +3,46 @@ Text Processor - Utilities for extracting and creating custom text formats.
 """
 
 import json
+import mmap
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Set
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Default web UI root: up from ocr_runner -> ocr_benchmark -> Abstract files
+_DEFAULT_WEB_UI_BASE_DIR = Path(__file__).parents[2]
+
+# Model -> (web UI directory, custom_text file prefix)
+_WEB_UI_MODEL_INFO = {
+    "doctr": ("Doctr", "ct_"),
+    "surya": ("Surya", "ct_"),
+    "paddle": ("PaddleOCR", "Input_"),
+}
+
+# Files above this size are memory-mapped for parsing instead of read into memory
+_MMAP_MIN_SIZE = 256 * 1024
+
+# File suffixes parsed as OCR JSON output by load_text_file
+_JSON_SUFFIXES = frozenset({'.json'})
+
+# Keys searched for text in OCR JSON output, in priority order
+_TEXT_KEYS = ("custom_text", "custom_texts", "text")
+_MISSING = object()
+
+# Directories already created by this process
+_created_dirs: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """mkdir -p, skipping the syscalls for directories this process already created."""
+    if path not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(path)
 
 
 def extract_custom_text(ocr_json: Union[str, Path, Dict]) -> str:
@@ -18,29 +56,32 @@ def extract_custom_text(ocr_json: Union[str, Path, Dict]) -> str:
         The custom_text string, or empty string if not found
     """
     if isinstance(ocr_json, (str, Path)):
-        with open(ocr_json, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(ocr_json, 'rb') as f:
+            if orjson and os.fstat(f.fileno()).st_size > _MMAP_MIN_SIZE:
+                # Parse large files straight from the page cache, no bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    data = orjson.loads(view)
+            else:
+                raw = f.read()
+                data = orjson.loads(raw) if orjson else json.loads(raw)
     else:
         data = ocr_json
     
-    # Handle different JSON structures
-    search_keys = ["custom_text", "custom_texts", "text"]
-    
-    # Check top-level first
-    for key in search_keys:
-        if key in data:
-            val = data[key]
-            return "\n".join(val) if isinstance(val, list) else str(val)
-            
-    # Check nested in "data" list
-    if "data" in data and isinstance(data["data"], list) and len(data["data"]) > 0:
-        first_item = data["data"][0]
-        for key in search_keys:
-            if key in first_item:
-                val = first_item[key]
-                return "\n".join(val) if isinstance(val, list) else str(val)
+    # Check top-level first, then nested in "data" list
+    val = _find_text_value(data)
+    if val is _MISSING:
+        items = data.get("data")
+        if isinstance(items, list) and items:
+            val = _find_text_value(items[0])
     
-    return ""
+    if val is _MISSING:
+        return ""
+    return "\n".join(val) if isinstance(val, list) else str(val)
+
+
+def _find_text_value(data: Dict) -> Any:
+    """Return the first present custom_text-like value in data, or _MISSING."""
+    return next((data[key] for key in _TEXT_KEYS if key in data), _MISSING)
 
 
 def create_custom_text(raw_text: str) -> str:
@@ -57,12 +98,7 @@ def create_custom_text(raw_text: str) -> str:
     # Strip leading/trailing whitespace from each line
     lines = [line.strip() for line in raw_text.split('\n')]
     # Remove empty lines at start/end but preserve internal structure
-    while lines and not lines[0]:
-        lines.pop(0)
-    while lines and not lines[-1]:
-        lines.pop()
-    
-    return '\n'.join(lines)
+    return '\n'.join(lines).strip('\n')
 
 
 def save_custom_text(custom_text: str, output_path: Union[str, Path]) -> None:
@@ -74,10 +110,9 @@ def save_custom_text(custom_text: str, output_path: Union[str, Path]) -> None:
         output_path: Path to output file
     """
     output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(output_path.parent)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(custom_text)
+    output_path.write_bytes(custom_text.encode('utf-8'))
 
 
 def load_text_file(file_path: Union[str, Path]) -> str:
@@ -90,13 +125,23 @@ def load_text_file(file_path: Union[str, Path]) -> str:
     Returns:
         Text content
     """
-    file_path = Path(file_path)
-    
-    if file_path.suffix.lower() == '.json':
-        return extract_custom_text(file_path)
-    else:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    # JSON-ness comes from the name the caller passed: a symlinked doc.json may
+    # point at a content-addressed blob with no suffix
+    suffix = Path(file_path).suffix
+    is_json = bool(suffix) and suffix.lower() in _JSON_SUFFIXES
+    path_str = os.path.realpath(file_path)
+    # mtime and size in the key invalidate the cache when the file changes
+    st = os.stat(path_str)
+    return _load_text_file_cached(path_str, is_json, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=512)
+def _load_text_file_cached(path_str: str, is_json: bool, mtime_ns: int, size: int) -> str:
+    """Read and parse a text/JSON file; cached because batch runs reload the same GT files."""
+    if is_json:
+        return extract_custom_text(Path(path_str))
+    with open(path_str, 'r', encoding='utf-8') as f:
+        return f.read()
 
 
 def save_for_web_ui(
@@ -122,40 +167,22 @@ def save_for_web_ui(
     Returns:
         Path to saved file
     """
-    if base_dir is None:
-        # Go up from ocr_runner -> ocr_benchmark -> Abstract files
-        base_dir = Path(__file__).parent.parent.parent
-    else:
-        base_dir = Path(base_dir)
-    
-    # Model to directory mapping
-    model_dirs = {
-        "doctr": "Doctr",
-        "surya": "Surya", 
-        "paddle": "PaddleOCR"
-    }
-    
-    # Model to file prefix mapping
-    file_prefixes = {
-        "doctr": "ct_",
-        "surya": "ct_",
-        "paddle": "Input_"
-    }
-    
-    model_lower = model.lower()
-    if model_lower not in model_dirs:
+    base_dir = _DEFAULT_WEB_UI_BASE_DIR if base_dir is None else Path(base_dir)
+    
+    try:
+        dir_name, file_prefix = _WEB_UI_MODEL_INFO[model.lower()]
+    except KeyError:
         raise ValueError(f"Unknown model: {model}. Expected: doctr, surya, paddle")
     
     # Build output path
-    output_dir = base_dir / model_dirs[model_lower] / "custom_text"
-    output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = base_dir / dir_name / "custom_text"
+    _ensure_dir(output_dir)
     
-    filename = f"{file_prefixes[model_lower]}{doc_number}.txt"
+    filename = f"{file_prefix}{doc_number}.txt"
     output_path = output_dir / filename
     
     # Save the file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(custom_text)
+    output_path.write_bytes(custom_text.encode('utf-8'))
     
     return output_path
 
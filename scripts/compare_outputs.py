@@ -1,42 +1,55 @@
 #!/usr/bin/env python3
 """Compare OCR outputs or against ground truth."""
 
+# Heavy imports (loguru, ocr_runner, download_from_r2) are deferred to the
+# functions that use them so --help and argument errors return immediately.
 import argparse
 import json
 import sys
-import subprocess
 from pathlib import Path
-from collections import Counter
+from typing import List, TYPE_CHECKING
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from ocr_runner.similarity_logic import compute_similarity, SimilarityResult
-from ocr_runner.text_processor import load_text_file
-from loguru import logger
+if TYPE_CHECKING:
+    from ocr_runner.similarity_logic import SimilarityResult
 
 
 def resolve_r2_path(r2_path: str, output_dir: str = "/tmp") -> str:
     """Download file from R2 if path starts with r2://."""
-    if not r2_path.startswith("r2://"):
-        return r2_path
+    return resolve_r2_paths([r2_path], output_dir)[0]
+
+
+def resolve_r2_paths(paths: List[str], output_dir: str = "/tmp") -> List[str]:
+    """Resolve paths in order, downloading every r2:// path in one batch."""
+    local_paths = list(paths)
+    objects = []
+    
+    for i, path in enumerate(paths):
+        if not path.startswith("r2://"):
+            continue
+        
+        parts = path[5:].split("/", 1)
+        if len(parts) != 2:
+            raise ValueError(f"Invalid R2 path: {path}")
+        objects.append((i, parts[0], parts[1]))
     
-    parts = r2_path[5:].split("/", 1)
-    if len(parts) != 2:
-        raise ValueError(f"Invalid R2 path: {r2_path}")
+    if not objects:
+        return local_paths
     
-    bucket, remote_path = parts
-    local_path = Path(output_dir) / Path(remote_path).name
+    from download_from_r2 import download_objects_from_r2
     
-    cmd = ["mc", "cp", f"r2/{bucket}/{remote_path}", str(local_path)]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"R2 download failed: {result.stderr}")
+    downloaded = download_objects_from_r2([(bucket, remote_path) for _, bucket, remote_path in objects], output_dir)
+    for (i, _, _), local_path in zip(objects, downloaded):
+        local_paths[i] = local_path
     
-    return str(local_path)
+    return local_paths
 
 
-def format_result(result: SimilarityResult, label1: str, label2: str) -> str:
+def format_result(result: "SimilarityResult", label1: str, label2: str) -> str:
     """Format result as text report."""
+    from collections import Counter
+    
     lines = [
         "=" * 60,
         "OCR COMPARISON REPORT",
@@ -53,10 +66,11 @@ def format_result(result: SimilarityResult, label1: str, label2: str) -> str:
     
     if result.missing_words:
         lines.append("Missing Words:")
-        for word, count in Counter(result.missing_words).most_common(20):
+        counter = Counter(result.missing_words)
+        for word, count in counter.most_common(20):
             lines.append(f"  - '{word}'" + (f" (x{count})" if count > 1 else ""))
-        if len(set(result.missing_words)) > 20:
-            lines.append(f"  ... and {len(set(result.missing_words)) - 20} more")
+        if len(counter) > 20:
+            lines.append(f"  ... and {len(counter) - 20} more")
     
     lines.append("=" * 60)
     return "\n".join(lines)
@@ -83,12 +97,18 @@ def main():
         parser.error("Provide --reference/--compare or --source1/--source2")
         return
     
-    file1 = resolve_r2_path(file1)
-    file2 = resolve_r2_path(file2)
+    from ocr_runner.similarity_logic import compute_similarity
+    from ocr_runner.text_processor import load_text_file
+    from loguru import logger
+    
+    file1, file2 = resolve_r2_paths([file1, file2])
+    
+    from concurrent.futures import ThreadPoolExecutor
     
     try:
-        text1 = load_text_file(file1)
-        text2 = load_text_file(file2)
+        # Both loads are I/O + parse bound, so read them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            text1, text2 = executor.map(load_text_file, [file1, file2])
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
         sys.exit(1)
@@ -107,7 +127,7 @@ def main():
         output = format_result(result, label1, label2)
     
     if args.output:
-        Path(args.output).write_text(output)
+        Path(args.output).write_bytes(output.encode('utf-8'))
         logger.success(f"Saved: {args.output}")
     else:
         print(output)
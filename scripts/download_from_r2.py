@@ -8,15 +8,41 @@ Usage:
 """
 
 import argparse
+import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Tuple
 from loguru import logger
 
+# Matches botocore's default connection pool size
+_MAX_PARALLEL_DOWNLOADS = 10
+
+_s3_client = None
+
+
+def get_s3_client():
+    """Get or create an S3 client for R2, or None when boto3 or R2_ENDPOINT is unavailable."""
+    global _s3_client
+    if _s3_client is None and os.environ.get("R2_ENDPOINT"):
+        try:
+            import boto3
+        except ImportError:
+            return None
+        _s3_client = boto3.client(
+            "s3",
+            endpoint_url=os.environ["R2_ENDPOINT"],
+            aws_access_key_id=os.environ.get("R2_ACCESS_KEY"),
+            aws_secret_access_key=os.environ.get("R2_SECRET_KEY"),
+            region_name="auto",
+        )
+    return _s3_client
+
 
 def download_from_r2(bucket: str, remote_path: str, output_dir: str) -> str:
     """
-    Download file from R2 bucket using minio client.
+    Download file from R2 bucket, via boto3 when configured, else minio client.
     
     Args:
         bucket: R2 bucket name
@@ -32,22 +58,102 @@ def download_from_r2(bucket: str, remote_path: str, output_dir: str) -> str:
     # Ensure output directory exists
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
-    # Build mc command
     r2_full_path = f"r2/{bucket}/{remote_path}"
-    cmd = ["mc", "cp", r2_full_path, str(local_path)]
-    
     logger.info(f"Downloading: {r2_full_path} -> {local_path}")
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        logger.error(f"Download failed: {result.stderr}")
-        raise RuntimeError(f"Failed to download from R2: {result.stderr}")
+    s3 = get_s3_client()
+    if s3 is not None:
+        # In-process GET over the client's pooled connection, no mc process
+        try:
+            s3.download_file(bucket, remote_path, str(local_path))
+        except Exception as e:
+            logger.error(f"Download failed: {e}")
+            raise RuntimeError(f"Failed to download from R2: {e}")
+    else:
+        cmd = ["mc", "cp", r2_full_path, str(local_path)]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        
+        if result.returncode != 0:
+            logger.error(f"Download failed: {result.stderr}")
+            raise RuntimeError(f"Failed to download from R2: {result.stderr}")
     
     logger.success(f"Downloaded: {local_path}")
     return str(local_path)
 
 
+def _local_paths(objects: List[Tuple[str, str]], output_dir: str) -> List[str]:
+    """
+    Map (bucket, remote_path) pairs to local paths under output_dir.
+    
+    Files are saved by basename, except that distinct objects sharing a basename
+    are saved as output_dir/<bucket>/<remote_path> so neither overwrites the other.
+    """
+    sources_by_name = {}
+    for obj in objects:
+        sources_by_name.setdefault(Path(obj[1]).name, set()).add(obj)
+    
+    local_paths = []
+    for bucket, remote_path in objects:
+        name = Path(remote_path).name
+        if len(sources_by_name[name]) > 1:
+            local_paths.append(str(Path(output_dir) / bucket / remote_path))
+        else:
+            local_paths.append(str(Path(output_dir) / name))
+    return local_paths
+
+
+def download_objects_from_r2(objects: List[Tuple[str, str]], output_dir: str) -> List[str]:
+    """
+    Download (bucket, remote_path) objects as one batch.
+    
+    Uses parallel boto3 GETs when configured, else one mc invocation per target
+    directory. Objects listed more than once are downloaded once.
+    
+    Args:
+        objects: (bucket, remote_path) pairs
+        output_dir: Local directory to save files
+    
+    Returns:
+        Local paths to downloaded files, in input order
+    """
+    local_paths = _local_paths(objects, output_dir)
+    unique = dict(zip(objects, local_paths))
+    for local_path in set(unique.values()):
+        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    logger.info(f"Downloading {len(unique)} files from R2 -> {output_dir}")
+    
+    s3 = get_s3_client()
+    if s3 is not None:
+        # Parallel GETs sharing the client's keep-alive connection pool
+        def fetch(item):
+            (bucket, remote_path), local_path = item
+            s3.download_file(bucket, remote_path, local_path)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(unique), _MAX_PARALLEL_DOWNLOADS)) as executor:
+                list(executor.map(fetch, unique.items()))
+        except Exception as e:
+            logger.error(f"Download failed: {e}")
+            raise RuntimeError(f"Failed to download from R2: {e}")
+    else:
+        # mc copies multiple sources into a target directory in one process
+        by_dir = {}
+        for (bucket, remote_path), local_path in unique.items():
+            by_dir.setdefault(str(Path(local_path).parent), []).append(f"r2/{bucket}/{remote_path}")
+        
+        for target_dir, sources in by_dir.items():
+            cmd = ["mc", "cp", *sources, f"{target_dir}/"]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            
+            if result.returncode != 0:
+                logger.error(f"Download failed: {result.stderr}")
+                raise RuntimeError(f"Failed to download from R2: {result.stderr}")
+    
+    logger.success(f"Downloaded {len(unique)} files to {output_dir}")
+    return local_paths
+
+
 def parse_r2_path(r2_path: str) -> tuple:
     """Parse r2://bucket/path format."""
     if not r2_path.startswith("r2://"):
@@ -72,8 +178,8 @@ Examples:
     # Download using r2:// URL
     python download_from_r2.py --r2-path r2://ocr-data/images/doc_1.jpg --output inputs/
     
-    # Download multiple files
-    python download_from_r2.py --bucket ocr-data --path "images/*.jpg" --output inputs/
+    # Download multiple files in one batch
+    python download_from_r2.py --bucket ocr-data --path images/doc_1.jpg images/doc_2.jpg --output inputs/
         """
     )
     
@@ -83,11 +189,13 @@ Examples:
     )
     parser.add_argument(
         "--path", "-p",
-        help="Path within bucket"
+        nargs="+",
+        help="Path(s) within bucket"
     )
     parser.add_argument(
         "--r2-path",
-        help="Full R2 path (r2://bucket/path)"
+        nargs="+",
+        help="Full R2 path(s) (r2://bucket/path)"
     )
     parser.add_argument(
         "--output", "-o",
@@ -97,18 +205,19 @@ Examples:
     
     args = parser.parse_args()
     
-    # Determine bucket and path
+    # Determine bucket and paths, downloaded together as one batch
     if args.r2_path:
-        bucket, remote_path = parse_r2_path(args.r2_path)
+        objects = [parse_r2_path(r2_path) for r2_path in args.r2_path]
     elif args.bucket and args.path:
-        bucket, remote_path = args.bucket, args.path
+        objects = [(args.bucket, remote_path) for remote_path in args.path]
     else:
         parser.error("Provide either --r2-path or both --bucket and --path")
         return
     
     try:
-        local_path = download_from_r2(bucket, remote_path, args.output)
-        print(local_path)  # Print path for scripting
+        # Each local file is printed once, even when its source was listed twice
+        for local_path in dict.fromkeys(download_objects_from_r2(objects, args.output)):
+            print(local_path)  # Print path for scripting
     except Exception as e:
         logger.error(f"Download failed: {e}")
         sys.exit(1)
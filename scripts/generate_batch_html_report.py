@@ -1,173 +1,210 @@
 import argparse
+import io
 import json
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 from collections import Counter
-import html as html_escape
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from ocr_runner.similarity_logic import tokenize
+from ocr_runner.similarity_logic import _normalize_chars, summarize_scores, tokenize
+
+# Same output as html.escape(text), in a single C-level pass
+_HTML_TRANS = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
+# Result fields read by the report's JS; everything else stays out of the embedded JSON
+_UI_FIELDS = ("image", "basename", "success", "error", "word_count", "gt_comparison", "model_comparison")
+
+# Below this many results, per-result processing stays in-process
+_PARALLEL_MIN_RESULTS = 32
+
+# Static report stylesheet, kept out of the per-report f-string
+_REPORT_CSS = """\
+        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
+        
+        :root {
+            --bg: #0d1117;
+            --card: #161b22;
+            --border: #30363d;
+            --text: #f0f6fc;
+            --text-dim: #8b949e;
+            --accent: #58a6ff;
+            --success: #3fb950;
+            --warn: #d29922;
+            --err: #f85149;
+            --purple: #a371f7;
+        }
+        
+        * { box-sizing: border-box; margin: 0; padding: 0; }
+        body { font-family: 'Inter', sans-serif; background: var(--bg); color: var(--text); line-height: 1.6; padding: 40px 20px; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        
+        header { margin-bottom: 40px; border-bottom: 1px solid var(--border); padding-bottom: 20px; }
+        h1 { font-size: 32px; margin-bottom: 8px; background: linear-gradient(135deg, var(--accent), var(--purple)); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
+        .meta { color: var(--text-dim); font-size: 14px; }
+        
+        .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 16px; margin-bottom: 32px; }
+        .stat { background: var(--card); padding: 24px; border-radius: 12px; border: 1px solid var(--border); text-align: center; }
+        .stat .v { font-size: 32px; font-weight: 700; }
+        .stat .l { font-size: 12px; color: var(--text-dim); text-transform: uppercase; margin-top: 4px; letter-spacing: 0.5px; }
+        
+        table { width: 100%; border-collapse: collapse; background: var(--card); border-radius: 12px; overflow: hidden; border: 1px solid var(--border); }
+        th { background: #21262d; padding: 16px; text-align: left; font-size: 12px; text-transform: uppercase; color: var(--text-dim); }
+        td { padding: 16px; border-top: 1px solid var(--border); }
+        tr:hover { background: #21262d; cursor: pointer; }
+        
+        .badge { padding: 4px 10px; border-radius: 6px; font-size: 12px; font-weight: 600; }
+        .badge.high { background: #3fb95022; color: var(--success); }
+        .badge.medium { background: #d2992222; color: var(--warn); }
+        .badge.low { background: #f8514922; color: var(--err); }
+        
+        /* Modal / Detail View */
+        #detail-view { display: none; position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: rgba(0,0,0,0.85); backdrop-filter: blur(4px); z-index: 1000; overflow-y: auto; padding: 40px 20px; }
+        .modal { background: var(--bg); max-width: 1100px; margin: 0 auto; border-radius: 16px; border: 1px solid var(--border); padding: 32px; position: relative; }
+        .close { position: absolute; top: 20px; right: 20px; font-size: 24px; color: var(--text-dim); cursor: pointer; }
+        
+        .grid { display: grid; grid-template-columns: 1fr 1fr; gap: 24px; margin-top: 24px; }
+        .panel { background: var(--card); border-radius: 12px; border: 1px solid var(--border); padding: 20px; }
+        .panel h3 { font-size: 14px; margin-bottom: 12px; color: var(--text-dim); text-transform: uppercase; }
+        pre { font-family: 'JetBrains Mono', monospace; font-size: 12px; line-height: 2; white-space: pre-wrap; word-break: break-all; max-height: 500px; overflow-y: auto; padding: 12px; background: #0004; border-radius: 8px; }
+        
+        .w-common { color: var(--success); background: #3fb95015; padding: 2px 4px; border-radius: 4px; }
+        .w-unique { color: var(--warn); background: #d2992225; padding: 2px 4px; border-radius: 4px; font-weight: 600; }
+        
+        .chips { display: flex; flex-wrap: wrap; gap: 8px; margin-top: 12px; }
+        .chip { font-size: 11px; padding: 4px 8px; border-radius: 4px; font-family: 'JetBrains Mono', monospace; }
+        .chip.miss { background: #f8514922; color: var(--err); border: 1px solid #f8514933; }
+        .chip.ext { background: #d2992222; color: var(--warn); border: 1px solid #d2992233; }
+        .chip small { opacity: 0.6; margin-left: 4px; }"""
 
 
-def get_word_highlighted_html(text: str, other_text: str):
-    """Generate HTML with highlighted words unique to this text."""
+@lru_cache(maxsize=65536)
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    """
+    Tokens of a single word, cached across the whole batch.
+    
+    Kept apart from tokenize()'s own cache so the many single-word lookups
+    don't evict the full-document entries.
+    """
+    return tuple(_normalize_chars(word).split())
+
+
+def get_word_highlighted_html(text: str, unique_to_1: Set[str]):
+    """Generate HTML with highlighted words, marking those whose tokens are all in unique_to_1."""
     if not text:
         return ""
     
-    words1 = tokenize(text)
-    words2 = tokenize(other_text)
-    
-    unique_to_1 = set(words1) - set(words2)
-    
     lines = text.splitlines()
     highlighted_lines = []
+    # Rendered span per distinct word, so repeated words are tokenized only once
+    spans = {}
+    # One span buffer reused for every line; join() copies it out
+    result = []
     
     for line in lines:
         if not line.strip():
             highlighted_lines.append("")
             continue
             
-        words = line.split()
-        result = []
-        for word in words:
-            # Simple normalization for matching
-            norm = "".join(c.lower() for c in word if c.isalnum())
-            
-            is_unique = False
-            if norm:
-                # Check if any tokenized word from this word is in unique_to_1
-                t_words = tokenize(word)
-                if t_words and all(tw in unique_to_1 for tw in t_words):
-                    is_unique = True
-            
-            if is_unique:
-                result.append(f'<span class="w-unique">{html_escape.escape(word)}</span>')
-            else:
-                result.append(f'<span class="w-common">{html_escape.escape(word)}</span>')
+        # Escape the whole line in one pass; entities contain no whitespace,
+        # so its split() lines up word for word with the raw line's
+        result.clear()
+        for word, escaped in zip(line.split(), line.translate(_HTML_TRANS).split()):
+            span = spans.get(word)
+            if span is None:
+                # Check if any tokenized word from this word is in unique_to_1.
+                # A purely alphanumeric word normalizes to just its lowercase form;
+                # words without any alphanumeric character are never highlighted.
+                if word.isalnum():
+                    t_words = (word.lower(),)
+                elif any(map(str.isalnum, word)):
+                    t_words = _word_tokens(word)
+                else:
+                    t_words = ()
+                is_unique = bool(t_words) and all(tw in unique_to_1 for tw in t_words)
+                
+                css_class = "w-unique" if is_unique else "w-common"
+                span = spans[word] = f'<span class="{css_class}">{escaped}</span>'
+            result.append(span)
         
         highlighted_lines.append(" ".join(result))
     
     return "<br>".join(highlighted_lines)
 
 
+def _process_result(r: dict) -> dict:
+    """Build the embedded UI entry for one result: highlights and missing/extra chips."""
+    # Embed only what the page reads; the raw OCR/GT texts are already in the highlights
+    entry = {key: r[key] for key in _UI_FIELDS if key in r}
+    if r.get("success") and r.get("gt_text") and r.get("ocr_text"):
+        # Tokenize each text once per result
+        ocr_tokens = tokenize(r["ocr_text"])
+        gt_tokens = tokenize(r["gt_text"])
+        
+        # Vocabulary sets built once and shared by both highlight directions
+        ocr_vocab = set(ocr_tokens)
+        gt_vocab = set(gt_tokens)
+        entry["ocr_html"] = get_word_highlighted_html(r["ocr_text"], ocr_vocab - gt_vocab)
+        entry["gt_html"] = get_word_highlighted_html(r["gt_text"], gt_vocab - ocr_vocab)
+        
+        # Word differences for the chips
+        words_ocr = Counter(ocr_tokens)
+        words_gt = Counter(gt_tokens)
+        
+        # Counter subtraction keeps positive surpluses only; most_common(50) picks
+        # the 50 shown per list without a full sort, ties in first-seen order
+        entry["missing_words"] = (words_gt - words_ocr).most_common(50)
+        entry["extra_words"] = (words_ocr - words_gt).most_common(50)
+    
+    return entry
+
+
 def generate_batch_html(data: dict, run_number: str = None) -> str:
     """Generate a self-contained SPA HTML report."""
+    buf = io.BytesIO()
+    write_batch_html(buf, data, run_number)
+    return buf.getvalue().decode("utf-8")
+
+
+def write_batch_html(out: BinaryIO, data: dict, run_number: str = None) -> None:
+    """Write a self-contained SPA HTML report to a binary stream, piece by piece."""
     model = data.get("model", "unknown").upper()
     compare_model = data.get("compare_model")
     timestamp = data.get("timestamp", datetime.now().isoformat())
     results = data.get("results", [])
     
-    # Pre-process results for the UI
-    processed_results = []
-    for r in results:
-        entry = r.copy()
-        if r.get("success") and r.get("gt_text") and r.get("ocr_text"):
-            entry["ocr_html"] = get_word_highlighted_html(r["ocr_text"], r["gt_text"])
-            entry["gt_html"] = get_word_highlighted_html(r["gt_text"], r["ocr_text"])
-            
-            # Word differences for the chips
-            words_ocr = Counter(tokenize(r["ocr_text"]))
-            words_gt = Counter(tokenize(r["gt_text"]))
-            
-            missing = []
-            for w, count in words_gt.items():
-                diff = count - words_ocr.get(w, 0)
-                if diff > 0:
-                    missing.append({"w": w, "c": diff})
-            
-            extra = []
-            for w, count in words_ocr.items():
-                diff = count - words_gt.get(w, 0)
-                if diff > 0:
-                    extra.append({"w": w, "c": diff})
-            
-            entry["missing_words"] = sorted(missing, key=lambda x: x["c"], reverse=True)[:50]
-            entry["extra_words"] = sorted(extra, key=lambda x: x["c"], reverse=True)[:50]
-            
-        processed_results.append(entry)
+    # Pre-process results for the UI; pure CPU per result, so large batches
+    # fan out across processes (small ones aren't worth the pool startup)
+    if len(results) >= _PARALLEL_MIN_RESULTS and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as executor:
+            processed_results = list(executor.map(_process_result, results, chunksize=16))
+    else:
+        processed_results = [_process_result(r) for r in results]
 
     # Statistics
     successful = [r for r in results if r.get("success")]
     with_gt = [r for r in successful if r.get("gt_comparison")]
     total = len(results)
-    avg_sim = 0
-    high = medium = low = 0
-    
-    if with_gt:
-        sims = [r["gt_comparison"]["similarity"] for r in with_gt]
-        avg_sim = sum(sims) / len(sims)
-        high = len([s for s in sims if s >= 90])
-        medium = len([s for s in sims if 70 <= s < 90])
-        low = len([s for s in sims if s < 70])
-
-    # Convert results to JSON for embedding
-    results_json = json.dumps(processed_results)
+    avg_sim, high, medium, low = summarize_scores(r["gt_comparison"]["similarity"] for r in with_gt)
 
-    return f'''<!DOCTYPE html>
+    out.write(f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>OCR Benchmark Report - {model}</title>
     <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
-        
-        :root {{
-            --bg: #0d1117;
-            --card: #161b22;
-            --border: #30363d;
-            --text: #f0f6fc;
-            --text-dim: #8b949e;
-            --accent: #58a6ff;
-            --success: #3fb950;
-            --warn: #d29922;
-            --err: #f85149;
-            --purple: #a371f7;
-        }}
-        
-        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-        body {{ font-family: 'Inter', sans-serif; background: var(--bg); color: var(--text); line-height: 1.6; padding: 40px 20px; }}
-        .container {{ max-width: 1200px; margin: 0 auto; }}
-        
-        header {{ margin-bottom: 40px; border-bottom: 1px solid var(--border); padding-bottom: 20px; }}
-        h1 {{ font-size: 32px; margin-bottom: 8px; background: linear-gradient(135deg, var(--accent), var(--purple)); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
-        .meta {{ color: var(--text-dim); font-size: 14px; }}
-        
-        .stats {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 16px; margin-bottom: 32px; }}
-        .stat {{ background: var(--card); padding: 24px; border-radius: 12px; border: 1px solid var(--border); text-align: center; }}
-        .stat .v {{ font-size: 32px; font-weight: 700; }}
-        .stat .l {{ font-size: 12px; color: var(--text-dim); text-transform: uppercase; margin-top: 4px; letter-spacing: 0.5px; }}
-        
-        table {{ width: 100%; border-collapse: collapse; background: var(--card); border-radius: 12px; overflow: hidden; border: 1px solid var(--border); }}
-        th {{ background: #21262d; padding: 16px; text-align: left; font-size: 12px; text-transform: uppercase; color: var(--text-dim); }}
-        td {{ padding: 16px; border-top: 1px solid var(--border); }}
-        tr:hover {{ background: #21262d; cursor: pointer; }}
-        
-        .badge {{ padding: 4px 10px; border-radius: 6px; font-size: 12px; font-weight: 600; }}
-        .badge.high {{ background: #3fb95022; color: var(--success); }}
-        .badge.medium {{ background: #d2992222; color: var(--warn); }}
-        .badge.low {{ background: #f8514922; color: var(--err); }}
-        
-        /* Modal / Detail View */
-        #detail-view {{ display: none; position: fixed; top: 0; left: 0; width: 100%; height: 100%; background: rgba(0,0,0,0.85); backdrop-filter: blur(4px); z-index: 1000; overflow-y: auto; padding: 40px 20px; }}
-        .modal {{ background: var(--bg); max-width: 1100px; margin: 0 auto; border-radius: 16px; border: 1px solid var(--border); padding: 32px; position: relative; }}
-        .close {{ position: absolute; top: 20px; right: 20px; font-size: 24px; color: var(--text-dim); cursor: pointer; }}
-        
-        .grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 24px; margin-top: 24px; }}
-        .panel {{ background: var(--card); border-radius: 12px; border: 1px solid var(--border); padding: 20px; }}
-        .panel h3 {{ font-size: 14px; margin-bottom: 12px; color: var(--text-dim); text-transform: uppercase; }}
-        pre {{ font-family: 'JetBrains Mono', monospace; font-size: 12px; line-height: 2; white-space: pre-wrap; word-break: break-all; max-height: 500px; overflow-y: auto; padding: 12px; background: #0004; border-radius: 8px; }}
-        
-        .w-common {{ color: var(--success); background: #3fb95015; padding: 2px 4px; border-radius: 4px; }}
-        .w-unique {{ color: var(--warn); background: #d2992225; padding: 2px 4px; border-radius: 4px; font-weight: 600; }}
-        
-        .chips {{ display: flex; flex-wrap: wrap; gap: 8px; margin-top: 12px; }}
-        .chip {{ font-size: 11px; padding: 4px 8px; border-radius: 4px; font-family: 'JetBrains Mono', monospace; }}
-        .chip.miss {{ background: #f8514922; color: var(--err); border: 1px solid #f8514933; }}
-        .chip.ext {{ background: #d2992222; color: var(--warn); border: 1px solid #d2992233; }}
-        .chip small {{ opacity: 0.6; margin-left: 4px; }}
+{_REPORT_CSS}
     </style>
 </head>
 <body>
@@ -231,7 +268,16 @@ def generate_batch_html(data: dict, run_number: str = None) -> str:
     </div>
 
     <script>
-        const results = {results_json};
+        const results = '''.encode("utf-8"))
+    
+    # orjson emits UTF-8 bytes directly; one-shot json.dumps otherwise keeps the
+    # C encoder (json.dump streams through the pure-Python one)
+    if orjson:
+        out.write(orjson.dumps(processed_results))
+    else:
+        out.write(json.dumps(processed_results, separators=(",", ":")).encode("utf-8"))
+    
+    out.write(f''';
 
         function renderTable() {{
             const tbody = document.getElementById('table-body');
@@ -265,7 +311,7 @@ def generate_batch_html(data: dict, run_number: str = None) -> str:
             document.getElementById('gt-content').innerHTML = r.gt_html || 'N/A';
             
             const renderChips = (list, cls) => list.length ? 
-                list.map(w => `<span class="chip ${{cls}}">${{w.w}}${{w.c > 1 ? '<small>×'+w.c+'</small>' : ''}}</span>`).join('') :
+                list.map(([w, c]) => `<span class="chip ${{cls}}">${{w}}${{c > 1 ? '<small>×'+c+'</small>' : ''}}</span>`).join('') :
                 '<span style="color:var(--text-dim); font-size:12px">None</span>';
             
             document.getElementById('missing-chips').innerHTML = renderChips(r.missing_words || [], 'miss');
@@ -286,7 +332,7 @@ def generate_batch_html(data: dict, run_number: str = None) -> str:
         renderTable();
     </script>
 </body>
-</html>'''
+</html>'''.encode("utf-8"))
 
 
 def main():
@@ -301,12 +347,14 @@ def main():
         print(f"❌ Error: {args.results_json} not found")
         sys.exit(1)
         
-    data = json.loads(results_path.read_text())
-    html = generate_batch_html(data, args.run_number)
+    raw = results_path.read_bytes()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
     
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(html)
+    # Stream straight to disk instead of holding the whole page (and its encoding) in memory
+    with output_path.open("wb") as out:
+        write_batch_html(out, data, args.run_number)
     print(f"✅ Enhanced Report: {args.output}")
 
 
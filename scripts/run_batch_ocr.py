@@ -3,19 +3,25 @@
 
 import argparse
 import json
+import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from ocr_runner import run_ocr
-from ocr_runner.similarity_logic import compute_similarity
+from ocr_runner import run_ocr, iter_ocr
+from ocr_runner.ocr_router import OCRResult
+from ocr_runner.similarity_logic import compute_similarity, summarize_scores
 from ocr_runner.text_processor import load_text_file, save_custom_text
 from loguru import logger
 
+# Case-sensitive suffixes picked up from a local images folder
+LOCAL_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.JPG', '.JPEG', '.PNG')
+
 
 def list_r2_folder(r2_path: str) -> List[str]:
     """List image files in an R2 folder."""
@@ -69,9 +75,10 @@ def process_image(
     gt_path: str,
     model: str,
     compare_model: Optional[str],
-    output_dir: str
+    output_dir: str,
+    ocr_result: Optional[OCRResult] = None
 ) -> Dict:
-    """Process a single image and return results."""
+    """Process a single image and return results, reusing ocr_result if already computed."""
     image_name = Path(image_path).name
     basename = Path(image_path).stem
     
@@ -80,7 +87,8 @@ def process_image(
     result = {"image": image_name, "basename": basename, "model": model, "success": False}
     
     try:
-        ocr_result = run_ocr(image_path, model)
+        if ocr_result is None:
+            ocr_result = run_ocr(image_path, model)
         
         if not ocr_result.success:
             result["error"] = ocr_result.error
@@ -139,11 +147,7 @@ def generate_summary(results: List[Dict], model: str) -> str:
     ]
     
     if with_gt:
-        similarities = [r["gt_comparison"]["similarity"] for r in with_gt]
-        avg = sum(similarities) / len(similarities)
-        high = len([s for s in similarities if s >= 90])
-        med = len([s for s in similarities if 70 <= s < 90])
-        low = len([s for s in similarities if s < 70])
+        avg, high, med, low = summarize_scores(r["gt_comparison"]["similarity"] for r in with_gt)
         
         lines.extend([
             f"Avg Similarity: {avg:.2f}%",
@@ -187,20 +191,27 @@ def main():
         temp_dir = output_dir / "temp_images"
         temp_dir.mkdir(exist_ok=True)
         
-        images_to_process = []
-        for img in image_files:
-            folder_cleaned = args.images_folder.replace("r2://", "r2/")
-            r2_path = f"{folder_cleaned.rstrip('/')}/{img}"
+        folder_cleaned = args.images_folder.replace("r2://", "r2/").rstrip('/')
+        
+        def download(img: str) -> Optional[str]:
             try:
-                local = download_r2_file(r2_path, str(temp_dir))
-                images_to_process.append((local, img))
+                return download_r2_file(f"{folder_cleaned}/{img}", str(temp_dir))
             except Exception as e:
                 logger.error(f"Failed: {img}: {e}")
+                return None
+        
+        # Downloads are network-bound mc calls; run them concurrently, keeping list order
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            downloaded = list(executor.map(download, image_files))
+        images_to_process = [(local, img) for local, img in zip(downloaded, image_files) if local]
     else:
         images_folder = Path(args.images_folder)
-        image_files = []
-        for ext in ['*.jpg', '*.jpeg', '*.png', '*.webp', '*.JPG', '*.JPEG', '*.PNG']:
-            image_files.extend(images_folder.glob(ext))
+        # One directory pass instead of a glob per extension
+        with os.scandir(images_folder) as entries:
+            image_files = [
+                images_folder / entry.name for entry in entries
+                if entry.name.endswith(LOCAL_IMAGE_EXTENSIONS) and entry.is_file()
+            ]
         images_to_process = [(str(p), p.name) for p in sorted(image_files)]
         logger.info(f"Found {len(images_to_process)} images locally")
     # Process images
@@ -209,14 +220,29 @@ def main():
     temp_gt_dir = output_dir / "temp_gt"
     temp_gt_dir.mkdir(exist_ok=True)
     
-    for local_path, image_name in images_to_process:
+    # Ground Truth location is fixed for the run; resolve it once
+    gt_is_r2 = args.gt_folder.startswith(("r2://", "r2/")) or not Path(args.gt_folder).exists()
+    gt_folder_cleaned = args.gt_folder.replace("r2://", "") if gt_is_r2 else args.gt_folder
+    gt_folder_cleaned = gt_folder_cleaned.rstrip('/')
+    
+    if "paddle" in (args.model, args.compare_model) and images_to_process:
+        from ocr_runner.paddle_local import warmup
+        # Build the model pool and run a first inference before the per-image loop,
+        # so the first image does not pay for setup
+        try:
+            warmup()
+        except Exception as e:
+            logger.warning(f"PaddleOCR warmup failed: {e}")
+    
+    # Prefetch: the next images load and run OCR while the current one is compared
+    ocr_results = iter_ocr([local for local, _ in images_to_process], args.model)
+    
+    for (local_path, image_name), ocr_result in zip(images_to_process, ocr_results):
         basename = Path(image_name).stem
         
         # Resolve Ground Truth path
-        gt_is_r2 = args.gt_folder.startswith(("r2://", "r2/")) or not Path(args.gt_folder).exists()
         if gt_is_r2:
-            gt_folder_cleaned = args.gt_folder.replace("r2://", "")
-            gt_r2_path = f"{gt_folder_cleaned.rstrip('/')}/{basename}.json"
+            gt_r2_path = f"{gt_folder_cleaned}/{basename}.json"
             try:
                 logger.info(f"Downloading GT from R2: {gt_r2_path}")
                 gt_path = download_r2_file(gt_r2_path, str(temp_gt_dir))
@@ -224,9 +250,9 @@ def main():
                 logger.warning(f"Could not download GT {gt_r2_path}: {e}")
                 gt_path = gt_r2_path 
         else:
-            gt_path = f"{args.gt_folder.rstrip('/')}/{basename}.json"
+            gt_path = f"{gt_folder_cleaned}/{basename}.json"
             
-        result = process_image(local_path, gt_path, args.model, args.compare_model, str(output_dir))
+        result = process_image(local_path, gt_path, args.model, args.compare_model, str(output_dir), ocr_result)
         results.append(result)
     
     summary = generate_summary(results, args.model)